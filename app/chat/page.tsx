@@ -108,15 +108,36 @@ export default function ChatPage() {
         body: JSON.stringify({ message: inputMessage }),
       })
 
-      if (response.ok) {
-        const data = await response.json()
-        const botMessage: Message = {
-          id: `bot-${Date.now()}`,
-          content: data.response,
-          isUser: false,
-          timestamp: new Date(data.timestamp),
+      if (response.ok && response.body) {
+        // The reply arrives as server-sent events: "delta" chunks, then a final "done" event
+        const botId = `bot-${Date.now()}`
+        setMessages((prev) => [...prev, { id: botId, content: "", isUser: false, timestamp: new Date() }])
+
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ""
+        while (true) {
+          const { done, value } = await reader.read()
+          if (done) break
+          buffer += decoder.decode(value, { stream: true })
+          const events = buffer.split("\n\n")
+          buffer = events.pop() ?? ""
+
+          for (const event of events) {
+            const lines = event.split("\n")
+            const type = lines.find((line) => line.startsWith("event: "))?.slice(7) ?? "message"
+            const data = JSON.parse(lines.find((line) => line.startsWith("data: "))?.slice(6) ?? "{}")
+            if (type === "error") throw new Error(data.detail)
+
+            setMessages((prev) =>
+              prev.map((m) => {
+                if (m.id !== botId) return m
+                if (type === "done") return { ...m, content: data.response, timestamp: new Date(data.timestamp) }
+                return { ...m, content: m.content + data.delta }
+              }),
+            )
+          }
         }
-        setMessages((prev) => [...prev, botMessage])
       } else if (response.status === 401) {
         localStorage.removeItem("token")
         router.push("/login")
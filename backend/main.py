@@ -1,36 +1,131 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import create_engine, event, insert, select, text, Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+from typing import Literal
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
+import logging
+import orjson
+import anyio
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import threading
+import time
+from cachetools import TTLCache
 from dotenv import load_dotenv
-import httpx
+from groq import AsyncGroq, DefaultAioHttpClient, APIStatusError, APITimeoutError
+import redis.asyncio as redis
 
 load_dotenv()
 
+# Per-request detail is logged at DEBUG, so it costs only a level check
+# unless explicitly enabled. uvicorn only configures its own loggers, so
+# this one gets its own handler.
+logger = logging.getLogger("chat")
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+logger.addHandler(log_handler)
+logger.propagate = False
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+if LOG_LEVEL in logging.getLevelNamesMapping():
+    logger.setLevel(LOG_LEVEL)
+else:
+    logger.setLevel(logging.INFO)
+    logger.warning("Unknown LOG_LEVEL %r, falling back to INFO", LOG_LEVEL)
+
 # Database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///./chat_app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=20,
+    max_overflow=40,
+)
+
+# WAL lets history reads run alongside chat inserts; the rest trade strict
+# durability on power loss and some memory for fewer fsyncs and disk reads
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2 for new hashes; bcrypt kept so existing hashes still verify and get
+# upgraded on the next successful login. Parallelism is stored in each hash,
+# so it is fixed rather than derived from the host's core count, which would
+# make every login on a differently sized host rehash the password.
+ARGON2_PARALLELISM = 2
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=65536,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 security = HTTPBearer()
 
 # Environment variables
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_TTL_SECONDS = 60
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+REDIS_URL = os.getenv("REDIS_URL")  # optional, shares the completion cache across workers
+COMPLETION_CACHE_SIZE = 1024
+COMPLETION_CACHE_TTL_SECONDS = 3600
 
-app = FastAPI(title="ChatGPT Clone API")
+# Groq model per speed tier: "instant" has the lowest time to first token,
+# "balanced" trades some latency for a larger model
+SPEED_MAP = {
+    "instant": "llama-3.1-8b-instant",
+    "balanced": "meta-llama/llama-4-scout-17b-16e-instruct",
+}
+GROQ_TEMPERATURE = 0.7
+
+# Shared Groq client (aiohttp transport), so chat requests reuse pooled
+# keep-alive connections instead of paying a TCP+TLS handshake each time
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # AsyncGroq refuses to build without a key; /chat reports the missing key
+    app.state.groq = None
+    if GROQ_API_KEY:
+        app.state.groq = AsyncGroq(
+            api_key=GROQ_API_KEY,
+            http_client=DefaultAioHttpClient(),
+            timeout=30.0,
+            max_retries=2,
+        )
+    app.state.redis = redis.from_url(REDIS_URL) if REDIS_URL else None
+    try:
+        yield
+    finally:
+        if app.state.groq is not None:
+            await app.state.groq.close()
+        if app.state.redis is not None:
+            await app.state.redis.aclose()
+
+app = FastAPI(
+    title="ChatGPT Clone API",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -42,13 +137,17 @@ app.add_middleware(
 )
 
 # Database Models
+# SQLite stamps rows at insert time; CURRENT_TIMESTAMP only has second
+# precision, which would leave messages sent in the same second unordered
+CURRENT_TIMESTAMP_MS = text("(strftime('%Y-%m-%d %H:%M:%f', 'now'))")
+
 class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=CURRENT_TIMESTAMP_MS)
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -57,10 +156,40 @@ class ChatMessage(Base):
     user_id = Column(Integer, index=True)
     message = Column(Text)
     response = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=CURRENT_TIMESTAMP_MS)
+
+    # History is read per user, newest first
+    __table_args__ = (
+        Index("ix_chat_user_time", "user_id", created_at.desc()),
+    )
+
+# Tables created before created_at had a server default would get NULL
+# timestamps, and SQLite cannot alter a column default, so rebuild them
+def add_created_at_defaults():
+    for table in Base.metadata.sorted_tables:
+        with engine.connect() as conn:
+            columns = conn.exec_driver_sql(f"PRAGMA table_info({table.name})").all()
+            if not any(col.name == "created_at" and col.dflt_value is None for col in columns):
+                continue
+            conn.exec_driver_sql("BEGIN")
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {table.name}_old")
+            for index in table.indexes:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+            table.create(conn)
+            names = ", ".join(column.name for column in table.columns)
+            conn.exec_driver_sql(
+                f"INSERT INTO {table.name} ({names}) SELECT {names} FROM {table.name}_old"
+            )
+            conn.exec_driver_sql(f"DROP TABLE {table.name}_old")
+            conn.commit()
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+add_created_at_defaults()
+# create_all skips tables that already exist, so add indexes they are missing
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 # Pydantic models
 class UserCreate(BaseModel):
@@ -73,12 +202,19 @@ class UserLogin(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    tier: Literal["instant", "balanced"] = "instant"
+    max_tokens: int = Field(default=256, ge=1, le=1024)
+    temperature: float = Field(default=GROQ_TEMPERATURE, ge=0, le=2)
 
 class ChatResponse(BaseModel):
     message: str
     response: str
     timestamp: datetime
 
+class CurrentUser(BaseModel):
+    id: int
+    email: str
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -92,8 +228,8 @@ def get_db():
         db.close()
 
 # Utility functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def verify_and_update_password(plain_password, hashed_password):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -101,14 +237,33 @@ def get_password_hash(password):
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+# Recently decoded tokens, so repeat requests from the same client skip
+# jwt.decode. get_current_user runs in the threadpool, hence the lock.
+token_cache = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL_SECONDS)
+token_cache_lock = threading.Lock()
+
+def decode_access_token(token: str):
+    with token_cache_lock:
+        payload = token_cache.get(token)
+    # An entry may outlive the token itself when it expires inside the TTL
+    if payload is not None and payload["exp"] > time.time():
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    with token_cache_lock:
+        token_cache[token] = payload
+    return payload
+
+# Tokens carry the user id, so protected endpoints validate them offline
+# without reloading the user row on every request
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -116,40 +271,87 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     )
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
-        if email is None:
+        user_id: int = payload.get("uid")
+        if email is None or user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    return CurrentUser(id=user_id, email=email)
+
+# Completion cache: in-process LRU, backed by Redis when REDIS_URL is set.
+# Only temperature 0 replies are cached, since sampled replies should vary.
+# Dict operations never await, so the LRU needs no lock on the event loop.
+completion_cache = OrderedDict()
+
+def completion_cache_key(model: str, max_tokens: int, message: str):
+    return hashlib.blake2b(
+        f"{model}\0{max_tokens}\0".encode() + message.encode()
+    ).hexdigest()
+
+def cache_completion_locally(key: str, completion: str):
+    completion_cache[key] = (time.monotonic() + COMPLETION_CACHE_TTL_SECONDS, completion)
+    completion_cache.move_to_end(key)
+    while len(completion_cache) > COMPLETION_CACHE_SIZE:
+        completion_cache.popitem(last=False)
+
+async def get_cached_completion(key: str):
+    if key in completion_cache:
+        expires_at, completion = completion_cache[key]
+        if expires_at > time.monotonic():
+            completion_cache.move_to_end(key)
+            return completion
+        del completion_cache[key]
+    if app.state.redis is not None:
+        try:
+            cached = await app.state.redis.get(f"completion:{key}")
+        except redis.RedisError:
+            logger.warning("Redis completion cache lookup failed", exc_info=True)
+            return None
+        if cached is not None:
+            completion = cached.decode()
+            cache_completion_locally(key, completion)
+            return completion
+    return None
+
+async def set_cached_completion(key: str, completion: str):
+    cache_completion_locally(key, completion)
+    if app.state.redis is not None:
+        try:
+            await app.state.redis.set(
+                f"completion:{key}", completion, ex=COMPLETION_CACHE_TTL_SECONDS
+            )
+        except redis.RedisError:
+            logger.warning("Redis completion cache write failed", exc_info=True)
 
 # Authentication endpoints
 @app.post("/register", response_model=Token)
 async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    email_taken = db.query(
+        db.query(User.id).filter(User.email == user.email).exists()
+    ).scalar()
+    if email_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
+    # The flush assigns the id; read it before commit expires the instance
+    db.flush()
+    user_id = db_user.id
     db.commit()
-    db.refresh(db_user)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user_id}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -158,130 +360,183 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 async def login(user: UserLogin, db: Session = Depends(get_db)):
     # Authenticate user
     db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    verified, new_hash = False, None
+    if db_user:
+        verified, new_hash = await run_in_threadpool(
+            verify_and_update_password, user.password, db_user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Rehash legacy bcrypt passwords with argon2
+    if new_hash:
+        db_user.hashed_password = new_hash
+        db.commit()
+    
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": db_user.id}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
+# Runs as a background task once the response is sent, so it opens its own
+# session rather than borrowing the request's
+def persist_chat(user_id: int, message: str, response: str):
+    logger.debug("Saving chat message to DB")
+    db = SessionLocal()
+    try:
+        # Core insert: the row is never read back, so skip the ORM unit of work
+        db.execute(
+            insert(ChatMessage).values(
+                user_id=user_id,
+                message=message,
+                response=response
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+    logger.debug("Chat saved for user %s", user_id)
+
 # Chat endpoint with OpenAI integration
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/chat")
 async def chat(
     chat_request: ChatRequest, 
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    print("🔹 Chat endpoint hit")
-    print(f"🔹 Incoming request: {chat_request}")
-    print(f"🔹 Current user: {current_user.id if current_user else 'None'}")
+    logger.debug("Chat request from user %s: %s", current_user.id, chat_request)
 
     if not GROQ_API_KEY:
-        print("❌ No GROQ_API_KEY found")
+        logger.error("No GROQ_API_KEY found")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="OpenAI API key not configured"
         )
     
-    try:
-        # Call OpenAI/Groq API
-        async with httpx.AsyncClient() as client:
-            print("🔹 Sending request to Groq API...")
-            response = await client.post(
-                # "https://api.openai.com/v1/chat/completions",  # OpenAI endpoint (disabled)
-                "https://api.groq.com/openai/v1/chat/completions",  # Groq endpoint (active)
-                headers={
-                    # "Authorization": f"Bearer {OPENAI_API_KEY}",  # OpenAI key (disabled)
-                    "Authorization": f"Bearer {GROQ_API_KEY}",     # Groq key (active)
-                    "Content-Type": "application/json"
-                },
-                json={
-                    # "model": "gpt-3.5-turbo",  # OpenAI model (disabled)
-                    "model": "meta-llama/llama-4-scout-17b-16e-instruct",  # Groq-supported model
-                    "messages": [
-                        {"role": "user", "content": chat_request.message}
-                    ],
-                    "max_tokens": 1000,
-                    "temperature": 0.7
-                },
-                timeout=30.0
+    model = SPEED_MAP[chat_request.tier]
+    cacheable = chat_request.temperature == 0
+    cache_key, cached = None, None
+    if cacheable:
+        cache_key = completion_cache_key(model, chat_request.max_tokens, chat_request.message)
+        cached = await get_cached_completion(cache_key)
+
+    if cached is None:
+        try:
+            # Call Groq API over the shared client, streaming tokens as they arrive
+            logger.debug("Sending request to Groq API")
+            stream = await app.state.groq.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "user", "content": chat_request.message}
+                ],
+                max_tokens=chat_request.max_tokens,
+                temperature=chat_request.temperature,
+                stream=True,
             )
-            
-            print(f"🔹 Groq API status code: {response.status_code}")
-            print(f"🔹 Groq API raw response: {response.text}")
-                        
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to get response from Groq API: {response.text}"
-                )
-            
-            openai_response = response.json()
-            print(f"🔹 Parsed API response: {openai_response}")
-
-            ai_message = openai_response["choices"][0]["message"]["content"]
-            print(f"🔹 AI message: {ai_message}")
-            
-            # Save chat message to database
-            print("🔹 Saving chat message to DB...")
-            chat_message = ChatMessage(
-                user_id=current_user.id,
-                message=chat_request.message,
-                response=ai_message
+        except APITimeoutError:
+            logger.warning("Timeout error when calling Groq API")
+            raise HTTPException(
+                status_code=status.HTTP_408_REQUEST_TIMEOUT,
+                detail="Request to Groq API timed out"
+            )
+        except APIStatusError as e:
+            logger.error("Groq API error: %s %s", e.status_code, e.response.text)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to get response from Groq API: {e.response.text}"
             )
-            db.add(chat_message)
-            db.commit()
-            print("✅ Chat saved successfully")
-            
-            return ChatResponse(
+        except Exception as e:
+            logger.exception("Unexpected error calling Groq API")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An error occurred: {str(e)}"
+            )
+
+    # Server-sent events: one "delta" event per chunk, then a "done" event
+    # carrying the full ChatResponse
+    async def event_stream():
+        chunks = []
+        completed = False
+        try:
+            if cached is not None:
+                logger.debug("Serving completion from cache")
+                chunks.append(cached)
+                yield b"data: " + orjson.dumps({"delta": cached}) + b"\n\n"
+            else:
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        chunks.append(delta)
+                        yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+
+            ai_message = "".join(chunks)
+            logger.debug("AI message: %s", ai_message)
+            if cacheable and cached is None and ai_message:
+                await set_cached_completion(cache_key, ai_message)
+            done = ChatResponse(
                 message=chat_request.message,
                 response=ai_message,
-                timestamp=datetime.utcnow()
+                timestamp=datetime.now(timezone.utc)
             )
-            
-    except httpx.TimeoutException:
-        print("❌ Timeout error when calling Groq API")
-        raise HTTPException(
-            status_code=status.HTTP_408_REQUEST_TIMEOUT,
-            detail="Request to Groq API timed out"
-        )
-    except Exception as e:
-        import traceback
-        print("❌ Unexpected error occurred:", str(e))
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred: {str(e)}"
-        )
+            completed = True
+            yield b"event: done\ndata: " + orjson.dumps(done.model_dump()) + b"\n\n"
+        except Exception as e:
+            logger.exception("Error while streaming Groq response")
+            yield b"event: error\ndata: " + orjson.dumps({"detail": f"An error occurred: {str(e)}"}) + b"\n\n"
+        finally:
+            # AsyncStream only releases its connection once read to the end,
+            # so close it explicitly on errors and client disconnects; shield
+            # the close from the cancellation that a disconnect delivers
+            if cached is None:
+                with anyio.CancelScope(shield=True):
+                    await stream.close()
+            # Save complete replies after the response has been sent; errored
+            # or abandoned ones would read as full answers in the history
+            if completed and chunks:
+                background_tasks.add_task(
+                    persist_chat, current_user.id, chat_request.message, "".join(chunks)
+                )
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 # Endpoint to get chat history
 @app.get("/chat/history")
 async def get_chat_history(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    messages = db.query(ChatMessage).filter(
-        ChatMessage.user_id == current_user.id
-    ).order_by(ChatMessage.created_at.desc()).limit(50).all()
+    # Latest 50 messages, returned oldest first
+    latest = (
+        select(
+            ChatMessage.id,
+            ChatMessage.message,
+            ChatMessage.response,
+            ChatMessage.created_at.label("timestamp"),
+        )
+        .where(ChatMessage.user_id == current_user.id)
+        .order_by(ChatMessage.created_at.desc())
+        .limit(50)
+        .subquery()
+    )
+    query = select(latest).order_by(latest.c.timestamp.asc())
+    # The session is synchronous, so keep the SQLite read off the event loop
+    rows = await run_in_threadpool(lambda: db.execute(query).all())
     
-    return [
-        {
-            "id": msg.id,
-            "message": msg.message,
-            "response": msg.response,
-            "timestamp": msg.created_at
-        }
-        for msg in reversed(messages)
-    ]
+    # SQLite stores created_at as naive UTC; tag it so clients don't read it
+    # as local time and it matches the live reply's timestamp. Returning the
+    # response directly skips jsonable_encoder, leaving datetimes to orjson.
+    return ORJSONResponse([
+        {**row._mapping, "timestamp": row.timestamp.replace(tzinfo=timezone.utc)}
+        for row in rows
+    ])
 
 @app.get("/")
 async def root():